@@ -1,12 +1,19 @@
 import argparse
 import os
 import time
-from queue import Queue
-from threading import Thread
-
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from functools import partial
+from importlib.metadata import PackageNotFoundError, version
+from itertools import count
+from queue import Full, Queue
+from threading import Lock, Thread
+
+import orjson
 import requests
 from dotenv import load_dotenv
 from lxmfy import IconAppearance, LXMFBot, pack_icon_appearance_field
+from requests.adapters import HTTPAdapter
 
 
 def parse_args():
@@ -24,6 +31,28 @@ def parse_args():
     return parser.parse_args()
 
 
+def parse_int_env(name, default, minimum=0):
+    """Read a whole-number setting from the environment.
+
+    Args:
+        name: Environment variable name
+        default: Value to use when the variable is unset, blank or invalid
+        minimum: Smallest accepted value; lower values are raised to it
+
+    Returns:
+        The parsed integer
+
+    """
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        return max(int(value), minimum)
+    except ValueError:
+        print(f"Warning: Invalid {name} value: {value!r}. Using {default}.")
+        return default
+
+
 args = parse_args()
 
 if args.env:
@@ -37,11 +66,15 @@ OLLAMA_API_URL = args.api_url or os.getenv(
     "http://localhost:11434",
 )
 MODEL = args.model or os.getenv("OLLAMA_MODEL", "llama3.2:latest")
+MAX_CONCURRENT_REQUESTS = parse_int_env("OLLAMA_MAX_CONCURRENT", 10, minimum=1)
+RESPONSE_CACHE_SIZE = parse_int_env("RESPONSE_CACHE_SIZE", 0)
+VERIFY_MODEL = os.getenv("OLLAMA_VERIFY_MODEL", "true").lower() == "true"
 SAVE_CHAT_HISTORY = False
-LXMF_ADMINS = (
-    set(filter(None, args.admins.split(",")))
-    if args.admins
-    else set(filter(None, os.getenv("LXMF_ADMINS", "").split(",")))
+MAX_QUEUED_CHATS = 10
+LXMF_ADMINS = frozenset(
+    admin.strip().lower()
+    for admin in (args.admins or os.getenv("LXMF_ADMINS", "")).split(",")
+    if admin.strip()
 )
 SIGNATURE_VERIFICATION_ENABLED = (
     os.getenv("SIGNATURE_VERIFICATION_ENABLED", "false").lower() == "true"
@@ -56,6 +89,16 @@ SYSTEM_PROMPT = os.getenv("SYSTEM_PROMPT", "")
 BOT_OPERATOR = os.getenv("BOT_OPERATOR", "Anonymous Operator")
 CONTEXT_FILES = os.getenv("CONTEXT_FILES", "")
 
+HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+# Leading/trailing bytes that str.strip() could remove after decoding
+STRIPPABLE_BYTES = frozenset(b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f")
+
+try:
+    USER_AGENT = f"lxmfy-ollama-bot/{version('lxmfy-ollama-bot')}"
+except PackageNotFoundError:
+    USER_AGENT = "lxmfy-ollama-bot"
+
 
 def load_context_files(file_paths_str):
     """Load content from context files specified in CONTEXT_FILES env var.
@@ -132,26 +175,209 @@ def format_uptime(seconds):
     return " ".join(parts)
 
 
+def parse_hex_color(value, default):
+    """Convert a 6-digit hex color string to RGB bytes.
+
+    Args:
+        value: Hex color string such as "2563eb"
+        default: RGB bytes to use when value is not a valid color
+
+    Returns:
+        Three RGB bytes
+
+    """
+    if len(value) == 6 and all(c in HEX_DIGITS for c in value):
+        return bytes.fromhex(value)
+    print(f"Warning: Invalid icon color format: {value!r}. Using default color.")
+    return default
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of model replies keyed by (model, prompt)."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        """Return the cached reply for key, or None on a miss"""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+            return text
+
+    def put(self, key, text):
+        """Store a reply, evicting the least recently used one when full"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class ReplySender:
+    """Send LXMF replies from one daemon thread, in the order they were queued.
+
+    lxmfy's outbound queue only holds a few messages and run() drains it
+    periodically, so its send() can block. Callers hand replies to this
+    sender instead and never wait on lxmfy.
+    """
+
+    def __init__(self, send, maxsize=100):
+        self._send = send
+        self._queue = Queue(maxsize=maxsize)
+        self.closed = False
+        Thread(target=self._run, name="lxmf-send", daemon=True).start()
+
+    def send(self, *args, **kwargs):
+        """Queue a reply; it is dropped and logged when closing or backed up"""
+        if self.closed:
+            print("Dropping reply: bot is shutting down")
+            return
+        try:
+            self._queue.put_nowait((args, kwargs))
+        except Full:
+            print("Dropping reply: send queue is full")
+
+    def close(self):
+        """Stop sending; replies still queued are dropped"""
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)
+        except Full:
+            pass  # The worker sees the closed flag after its current send
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None or self.closed:
+                return
+            args, kwargs = item
+            try:
+                self._send(*args, **kwargs)
+            except Exception as e:
+                print(f"Error sending reply: {e}")
+
+
 class OllamaAPI:
     """API client for interacting with Ollama models."""
 
-    def __init__(self, api_url, timeout=900, queue_size=10):
+    def __init__(
+        self,
+        api_url,
+        timeout=900,
+        queue_size=10,
+        max_retries=2,
+        retry_backoff=0.1,
+        verify_model=True,
+    ):
         self.api_url = api_url
         self.timeout = timeout
-        self.request_queue = Queue(maxsize=queue_size)
-        self.response_queue = {}
-        self._start_worker()
-        self._test_connection()
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._request_ids = count(1)
+        self.session = self._create_session(pool_maxsize=queue_size)
+        self.closed = False
+        self._work_queue = Queue()
+        self._workers = queue_size
+        self._pending = set()
+        self._pending_lock = Lock()
+        self._start_workers()
+        self._test_connection(verify_model)
+
+    @staticmethod
+    def _create_session(pool_maxsize=10):
+        """Create a pooled HTTP session so connections to Ollama are reused"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(
+            {
+                "Connection": "keep-alive",
+                "Accept-Encoding": "gzip, deflate",
+                "Content-Type": "application/json",
+                "User-Agent": USER_AGENT,
+            }
+        )
+        return session
+
+    @property
+    def pending_requests(self):
+        """Number of queued or running requests"""
+        return len(self._pending)
+
+    def close(self):
+        """Stop accepting requests and abandon in-flight ones
+
+        Queued requests are cancelled and running streams stop at their next
+        chunk. Workers are daemon threads, so a request still blocked on
+        Ollama never keeps the interpreter from exiting.
+        """
+        with self._pending_lock:
+            self.closed = True
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+        for _ in range(self._workers):
+            self._work_queue.put(None)
+        self.session.close()
+
+    def _start_workers(self):
+        """Start daemon worker threads that run queued requests concurrently"""
 
-    def _test_connection(self):
-        """Test connection to Ollama API and get available models"""
+        def worker():
+            while True:
+                item = self._work_queue.get()
+                if item is None:
+                    return
+                future, func, func_args = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(func(*func_args))
+                except Exception as e:
+                    future.set_exception(e)
+
+        for i in range(self._workers):
+            Thread(target=worker, name=f"ollama-{i}", daemon=True).start()
+
+    def _submit(self, func, *func_args):
+        """Queue func on the worker threads and return its Future"""
+        future = Future()
+        with self._pending_lock:
+            if self.closed:
+                raise RuntimeError("Ollama client is closed")
+            self._pending.add(future)
+        self._work_queue.put((future, func, func_args))
+        return future
+
+    def _test_connection(self, verify_model=True):
+        """Test connection to Ollama API and optionally check the configured model"""
         try:
-            response = requests.get(f"{self.api_url}/api/tags", timeout=5)
+            if not verify_model:
+                response = self.session.get(f"{self.api_url}/api/version", timeout=5)
+                if response.status_code == 200:
+                    ollama_version = orjson.loads(response.content).get("version", "?")
+                    print(f"✓ Connected to Ollama {ollama_version}")
+                else:
+                    print(f"✗ Ollama API returned status {response.status_code}")
+                return
+
+            response = self.session.get(f"{self.api_url}/api/tags", timeout=5)
             if response.status_code == 200:
-                models = response.json().get("models", [])
-                if models:
-                    print(f"✓ Connected to Ollama. {len(models)} model(s) available")
-                    if not any(MODEL in m["name"] for m in models):
+                names = [
+                    m["name"] for m in orjson.loads(response.content).get("models", ())
+                ]
+                if names:
+                    print(f"✓ Connected to Ollama. {len(names)} model(s) available")
+                    if not any(MODEL in name for name in names):
                         print(
                             f"⚠ Warning: Configured model '{MODEL}' not found in available models"
                         )
@@ -162,61 +388,118 @@ class OllamaAPI:
         except Exception as e:
             print(f"✗ Failed to connect to Ollama API: {e}")
 
-    def _start_worker(self):
-        """Start the worker thread to process requests"""
-
-        def worker():
-            while True:
-                request_id, endpoint, data, callback = self.request_queue.get()
-                try:
-                    response = requests.post(
-                        f"{self.api_url}/api/{endpoint}",
-                        json=data,
-                        timeout=self.timeout,
-                    )
-                    result = response.json()
-                    callback(result)
-                except Exception as e:
-                    callback({"error": str(e)})
-                    time.sleep(1)  # Add sleep here to prevent busy-waiting on errors
-                finally:
-                    self.request_queue.task_done()
-
-        thread = Thread(target=worker, daemon=True)
-        thread.start()
-
-    def _queue_request(self, endpoint, data, callback):
+    def _request(self, endpoint, data, stream=False):
+        """POST a JSON body to an Ollama endpoint and return the raw response
+
+        Connection failures are retried with exponential backoff; any other
+        error is raised immediately so the request fails fast.
+        """
+        # Pre-encoded bytes give requests a Content-Length instead of chunked framing
+        body = orjson.dumps(data)
+        backoff = self.retry_backoff
+        attempt = 0
+        while True:
+            try:
+                return self.session.post(
+                    f"{self.api_url}/api/{endpoint}",
+                    data=body,
+                    timeout=self.timeout,
+                    stream=stream,
+                )
+            except requests.exceptions.ConnectionError:
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _post(self, endpoint, data):
+        """POST a JSON body to an Ollama endpoint and return the parsed reply"""
+        return orjson.loads(self._request(endpoint, data).content)
+
+    def _post_stream(self, endpoint, data, on_token=None):
+        """POST a streaming request and assemble the reply as chunks arrive
+
+        Each text chunk is passed to on_token as it is decoded. The final
+        chunk is returned with its text replaced by the full reply, so it has
+        the same shape as a non-streamed response.
+
+        The request timeout only bounds the wait for each chunk, so the
+        whole reply is also held to it as a deadline.
+        """
+        key = "message" if endpoint == "chat" else "response"
+        parts = []
+        deadline = time.monotonic() + self.timeout
+        with self._request(endpoint, data, stream=True) as response:
+            for line in response.iter_lines():
+                if self.closed:
+                    return {"error": "Ollama client was closed"}
+                if time.monotonic() > deadline:
+                    return {
+                        "error": f"Ollama did not finish the reply within {self.timeout}s"
+                    }
+                if not line:
+                    continue
+                chunk = orjson.loads(line)
+                if "error" in chunk:
+                    return chunk
+                token = chunk.get(key, "")
+                if key == "message":
+                    token = token.get("content", "")
+                if token:
+                    parts.append(token)
+                    if on_token:
+                        on_token(token)
+                if chunk.get("done"):
+                    text = "".join(parts)
+                    if key == "message":
+                        chunk[key] = {"role": "assistant", "content": text}
+                    else:
+                        chunk[key] = text
+                    return chunk
+        return {"error": "Ollama closed the stream before the reply was complete"}
+
+    def _queue_request(self, endpoint, data, callback, on_token=None):
         """Queue a request with a callback"""
-        request_id = time.time()
-        self.request_queue.put((request_id, endpoint, data, callback))
+        request_id = next(self._request_ids)
+        if data["stream"]:
+            future = self._submit(self._post_stream, endpoint, data, on_token)
+        else:
+            future = self._submit(self._post, endpoint, data)
+        future.add_done_callback(partial(self._dispatch, callback))
         return request_id
 
-    def generate(self, prompt, stream=False, callback=None):
+    def _dispatch(self, callback, future):
+        """Hand a finished request's result, or its error, to the callback"""
+        with self._pending_lock:
+            self._pending.discard(future)
+        if future.cancelled():
+            # Still notify the caller so it can release per-request state
+            callback({"error": "Request was cancelled"})
+            return
+        error = future.exception()
+        callback({"error": str(error)} if error else future.result())
+
+    def generate(self, prompt, stream=False, callback=None, on_token=None):
         """Queue a generate request"""
         data = {"model": MODEL, "prompt": prompt, "stream": stream}
         if callback:
-            return self._queue_request("generate", data, callback)
+            return self._queue_request("generate", data, callback, on_token)
 
         # Synchronous fallback
-        response = requests.post(
-            f"{self.api_url}/api/generate",
-            json=data,
-            timeout=self.timeout,
-        )
-        return response.json()
+        if stream:
+            return self._post_stream("generate", data, on_token)
+        return self._post("generate", data)
 
-    def chat(self, messages, stream=False, callback=None):
+    def chat(self, messages, stream=False, callback=None, on_token=None):
         """Queue a chat request"""
         data = {"model": MODEL, "messages": messages, "stream": stream}
         if callback:
-            return self._queue_request("chat", data, callback)
+            return self._queue_request("chat", data, callback, on_token)
 
-        response = requests.post(
-            f"{self.api_url}/api/chat",
-            json=data,
-            timeout=self.timeout,
-        )
-        return response.json()
+        if stream:
+            return self._post_stream("chat", data, on_token)
+        return self._post("chat", data)
 
 
 CONTEXT_CONTENT = load_context_files(CONTEXT_FILES)
@@ -241,24 +524,41 @@ def create_bot():
     )
 
     # Set up bot icon
-    try:
-        icon_data = IconAppearance(
-            icon_name=BOT_ICON,
-            fg_color=bytes.fromhex(ICON_FG_COLOR),
-            bg_color=bytes.fromhex(ICON_BG_COLOR),
-        )
-        bot.icon_lxmf_field = pack_icon_appearance_field(icon_data)
-    except ValueError as e:
-        print(f"Warning: Invalid icon color format: {e}. Using default colors.")
-        icon_data = IconAppearance(
-            icon_name=BOT_ICON,
-            fg_color=b"\xff\xff\xff",  # white
-            bg_color=b"\x25\x63\xeb",  # blue
-        )
-        bot.icon_lxmf_field = pack_icon_appearance_field(icon_data)
+    icon_data = IconAppearance(
+        icon_name=BOT_ICON,
+        fg_color=parse_hex_color(ICON_FG_COLOR, b"\xff\xff\xff"),  # white
+        bg_color=parse_hex_color(ICON_BG_COLOR, b"\x25\x63\xeb"),  # blue
+    )
+    bot.icon_lxmf_field = pack_icon_appearance_field(icon_data)
+    icon_fields = bot.icon_lxmf_field
+
+    # The system prompt is fixed for the lifetime of the bot, so pick the
+    # message builder once and share a single system message between chats
+    if FULL_SYSTEM_PROMPT:
+        system_message = {"role": "system", "content": FULL_SYSTEM_PROMPT}
+
+        def build_messages(content):
+            """Build the chat messages for a user message"""
+            return [system_message, {"role": "user", "content": content}]
+
+    else:
 
-    bot.ollama = OllamaAPI(OLLAMA_API_URL, queue_size=10)
+        def build_messages(content):
+            """Build the chat messages for a user message"""
+            return [{"role": "user", "content": content}]
+
+    bot.ollama = OllamaAPI(
+        OLLAMA_API_URL,
+        queue_size=MAX_CONCURRENT_REQUESTS,
+        verify_model=VERIFY_MODEL,
+    )
     bot.save_chat_history = SAVE_CHAT_HISTORY
+    bot.response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+    bot.reply_sender = ReplySender(bot.send)
+
+    # Chats queued behind each sender's in-flight request
+    sender_chats = {}
+    sender_chats_lock = Lock()
 
     # Statistics tracking
     bot.start_time = time.time()
@@ -266,10 +566,9 @@ def create_bot():
     bot.error_count = 0
     bot.response_times = []
 
-    @bot.command(name="help")
-    def help_command(ctx):
-        """Show available commands"""
-        help_text = """Available Commands:
+    # Help, about and operator replies only depend on configuration, so
+    # build them once instead of on every command
+    help_text = """Available Commands:
 
 === General ===
 /help - Show this help message
@@ -280,14 +579,10 @@ def create_bot():
 === Chat ===
 Send any message without the "/" prefix to chat with the AI model.
 The bot will respond using the configured Ollama model."""
-        ctx.reply(help_text, lxmf_fields=bot.icon_lxmf_field)
 
-    @bot.command(name="about")
-    def about_command(ctx):
-        """Show bot information"""
-        sig_status = "Enabled" if SIGNATURE_VERIFICATION_ENABLED else "Disabled"
-        sig_required = "Required" if REQUIRE_MESSAGE_SIGNATURES else "Optional"
-        about_text = f"""OllamaBot v1.0.0
+    sig_status = "Enabled" if SIGNATURE_VERIFICATION_ENABLED else "Disabled"
+    sig_required = "Required" if REQUIRE_MESSAGE_SIGNATURES else "Optional"
+    about_text = f"""OllamaBot v1.0.0
 
 Connected to: {OLLAMA_API_URL}
 Model: {MODEL}
@@ -299,7 +594,25 @@ Icon Colors: FG={ICON_FG_COLOR}, BG={ICON_BG_COLOR}
 
 This bot allows you to chat with AI models through Ollama.
 Simply send a message without any command prefix to start chatting."""
-        ctx.reply(about_text, lxmf_fields=bot.icon_lxmf_field)
+
+    operator_text = f"""Bot Operator
+
+Operator: {BOT_OPERATOR}
+
+This bot is operated by {BOT_OPERATOR}.
+For questions or concerns, contact the operator through LXMF.
+
+Powered by LXMFy & Ollama"""
+
+    @bot.command(name="help")
+    def help_command(ctx):
+        """Show available commands"""
+        ctx.reply(help_text, lxmf_fields=icon_fields)
+
+    @bot.command(name="about")
+    def about_command(ctx):
+        """Show bot information"""
+        ctx.reply(about_text, lxmf_fields=icon_fields)
 
     @bot.command(name="stats")
     def stats_command(ctx):
@@ -315,8 +628,11 @@ Simply send a message without any command prefix to start chatting."""
         messages_per_hour = (bot.messages_processed / max(uptime_seconds, 1)) * 3600
         error_rate = (bot.error_count / max(bot.messages_processed, 1)) * 100
 
-        # Get current queue status
-        queue_size = bot.ollama.request_queue.qsize()
+        # Get current queue status: requests at Ollama plus chats waiting
+        # behind another chat from the same sender
+        with sender_chats_lock:
+            backlog_size = sum(len(backlog) for backlog in sender_chats.values())
+        queue_size = bot.ollama.pending_requests + backlog_size
 
         stats_text = f"""Bot Statistics
 
@@ -333,21 +649,107 @@ Fun Facts:
 - Slowest response: {max(bot.response_times) if bot.response_times else 0:.2f}s
 - Total thinking time: {sum(bot.response_times):.1f}s"""
 
-        ctx.reply(stats_text, lxmf_fields=bot.icon_lxmf_field)
+        ctx.reply(stats_text, lxmf_fields=icon_fields)
 
     @bot.command(name="operator")
     def operator_command(ctx):
         """Show bot operator information"""
-        operator_text = f"""Bot Operator
+        ctx.reply(operator_text, lxmf_fields=icon_fields)
 
-Operator: {BOT_OPERATOR}
+    def reply(sender_hash, text):
+        """Queue text to be sent back to a sender with the bot icon attached"""
+        bot.reply_sender.send(sender_hash, text, lxmf_fields=icon_fields)
 
-This bot is operated by {BOT_OPERATOR}.
-For questions or concerns, contact the operator through LXMF.
+    def handle_response(sender_hash, cache_key, request_start_time, response):
+        """Handle Ollama API response"""
+        try:
+            reply_text = build_reply(cache_key, request_start_time, response)
+        except Exception as e:
+            bot.error_count += 1
+            print(f"Error handling Ollama response: {e}")
+            reply_text = f"Error: Failed to handle AI response: {e!s}"
+        try:
+            reply(sender_hash, reply_text)
+        finally:
+            # Always release the sender, or their later messages never run
+            finish_chat(sender_hash)
 
-Powered by LXMFy & Ollama"""
+    def build_reply(cache_key, request_start_time, response):
+        """Turn an Ollama API response into the text sent to the user"""
+        # Track response time
+        response_time = time.time() - request_start_time
 
-        ctx.reply(operator_text, lxmf_fields=bot.icon_lxmf_field)
+        if "error" in response:
+            bot.error_count += 1
+            error_msg = str(response["error"])
+            if "connection" in error_msg.lower() or "timeout" in error_msg.lower():
+                return (
+                    f"Unable to connect to Ollama API. Please check if Ollama is "
+                    f"running at {OLLAMA_API_URL}"
+                )
+            return f"Error: {error_msg}"
+
+        bot.response_times.append(response_time)
+        if len(bot.response_times) > 1000:
+            bot.response_times.pop(0)
+
+        if "response" in response:
+            text = response["response"].strip()
+        elif "message" in response:
+            text = response["message"].get("content", "").strip()
+        else:
+            text = None
+
+        if text:
+            bot.response_cache.put(cache_key, text)
+            return text
+        if text is None:
+            return "Unexpected response format"
+        return "Received empty response from AI model"
+
+    def start_chat(sender_hash, content_str, cache_key):
+        """Answer a sender's chat message from the cache or via Ollama
+
+        Returns True when the chat is already finished, in which case the
+        caller must start the sender's next one, or False once it is waiting
+        on Ollama.
+        """
+        # Checked here rather than on arrival so cache hits wait their turn
+        cached_text = bot.response_cache.get(cache_key)
+        if cached_text is not None:
+            reply(sender_hash, cached_text)
+            return True
+
+        # Track message processing start
+        request_start_time = time.time()
+
+        try:
+            bot.ollama.chat(
+                build_messages(content_str),
+                stream=True,
+                callback=partial(
+                    handle_response, sender_hash, cache_key, request_start_time
+                ),
+            )
+        except Exception as e:
+            bot.error_count += 1
+            reply(sender_hash, f"Failed to process message: {e!s}")
+            return True
+        return False
+
+    def finish_chat(sender_hash):
+        """Start the sender's queued chats until one is waiting on Ollama"""
+        while True:
+            with sender_chats_lock:
+                backlog = sender_chats[sender_hash]
+                if not backlog:
+                    del sender_chats[sender_hash]
+                    return
+                content_str, cache_key = backlog.popleft()
+            if not start_chat(sender_hash, content_str, cache_key):
+                return
+
+    prefix_bytes = bot.command_prefix.encode("utf-8") if bot.command_prefix else None
 
     @bot.events.on("message_received")
     def handle_message(event):
@@ -362,78 +764,58 @@ Powered by LXMFy & Ollama"""
         ):
             return
 
+        # Blank messages and commands (handled by lxmfy itself) are dropped
+        # before paying for a decode
+        raw = lxmf_message.content
+        stripped = raw.lstrip()
+        if not stripped:
+            return
+        if prefix_bytes and stripped.startswith(prefix_bytes):
+            return
+
         try:
-            content_str = lxmf_message.content.decode("utf-8").strip()
+            content_str = raw.decode("utf-8")
         except UnicodeDecodeError:
-            bot.send(
-                sender_hash,
-                "Error: Message content is not valid UTF-8.",
-                lxmf_fields=bot.icon_lxmf_field,
-            )
+            reply(sender_hash, "Error: Message content is not valid UTF-8.")
             return
 
+        # Only strip when the edges could hold whitespace (non-ASCII included)
+        first, last = raw[0], raw[-1]
+        if (
+            first in STRIPPABLE_BYTES
+            or last in STRIPPABLE_BYTES
+            or first > 0x7F
+            or last > 0x7F
+        ):
+            content_str = content_str.strip()
+
         if bot.command_prefix and content_str.startswith(bot.command_prefix):
             return
 
         if not content_str:
             return
 
-        # Track message processing start
-        request_start_time = time.time()
+        cache_key = (MODEL, content_str)
 
-        def callback(response):
-            """Handle Ollama API response"""
-            # Track response time
-            response_time = time.time() - request_start_time
-
-            if "error" in response:
-                bot.error_count += 1
-                error_msg = response["error"]
-                if "connection" in error_msg.lower() or "timeout" in error_msg.lower():
-                    error_text = (
-                        f"Unable to connect to Ollama API. Please check if Ollama is "
-                        f"running at {OLLAMA_API_URL}"
-                    )
-                    bot.send(sender_hash, error_text, lxmf_fields=bot.icon_lxmf_field)
-                else:
-                    bot.send(
-                        sender_hash,
-                        f"Error: {error_msg}",
-                        lxmf_fields=bot.icon_lxmf_field,
-                    )
-            else:
-                bot.response_times.append(response_time)
-                if len(bot.response_times) > 1000:
-                    bot.response_times.pop(0)
-
-                if "response" in response:
-                    text = response["response"]
-                elif "message" in response:
-                    text = response["message"].get("content", "")
-                else:
-                    text = "Unexpected response format"
+        # Keep one chat in flight per sender so replies arrive in order
+        with sender_chats_lock:
+            backlog = sender_chats.get(sender_hash)
+            full = backlog is not None and len(backlog) >= MAX_QUEUED_CHATS
+            if backlog is None:
+                sender_chats[sender_hash] = deque()
+            elif not full:
+                backlog.append((content_str, cache_key))
 
-                if text.strip():
-                    bot.send(sender_hash, text.strip(), lxmf_fields=bot.icon_lxmf_field)
-                else:
-                    bot.send(
-                        sender_hash,
-                        "Received empty response from AI model",
-                        lxmf_fields=bot.icon_lxmf_field,
-                    )
+        if full:
+            reply(
+                sender_hash,
+                "Still working on your earlier messages, please wait before sending more.",
+            )
+            return
 
-        # Send chat message to Ollama
-        try:
-            bot.messages_processed += 1
-            messages = []
-            if FULL_SYSTEM_PROMPT:
-                messages.append({"role": "system", "content": FULL_SYSTEM_PROMPT})
-            messages.append({"role": "user", "content": content_str})
-            bot.ollama.chat(messages, callback=callback)
-        except Exception as e:
-            bot.error_count += 1
-            error_text = f"Failed to process message: {e!s}"
-            bot.send(sender_hash, error_text, lxmf_fields=bot.icon_lxmf_field)
+        bot.messages_processed += 1
+        if backlog is None and start_chat(sender_hash, content_str, cache_key):
+            finish_chat(sender_hash)
 
     return bot
 
@@ -443,6 +825,7 @@ def main():
     print(f"Starting {BOT_NAME}...")
     print(f"Ollama API: {OLLAMA_API_URL}")
     print(f"Model: {MODEL}")
+    print(f"Max Concurrent Requests: {MAX_CONCURRENT_REQUESTS}")
     if LXMF_ADMINS:
         print(f"Admins: {len(LXMF_ADMINS)} configured")
     sig_status = "Enabled" if SIGNATURE_VERIFICATION_ENABLED else "Disabled"
@@ -453,7 +836,11 @@ def main():
     print(f"Icon Colors: FG={ICON_FG_COLOR}, BG={ICON_BG_COLOR}")
 
     bot = create_bot()
-    bot.run()
+    try:
+        bot.run()
+    finally:
+        bot.ollama.close()
+        bot.reply_sender.close()
 
 
 if __name__ == "__main__":